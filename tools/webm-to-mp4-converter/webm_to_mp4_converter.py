@@ -5,7 +5,11 @@ import argparse
 import concurrent.futures
 import json
 import math
+import multiprocessing
 import os
+import queue
+import stat
+import struct
 import subprocess
 import sys
 import threading
@@ -36,26 +40,32 @@ class ProgressTracker:
         self._total_weight = sum(self._weights.values()) if self._weights else 1.0
         self._fractions = {task.input_name: 0.0 for task in tasks}
         self._last_pct = {task.input_name: -1.0 for task in tasks}
+        # Running sum(fraction * weight); kept in sync by update() so that
+        # _overall_percent is O(1) instead of iterating every task per tick.
+        self._weighted_sum = 0.0
+        # Messages go through a dedicated writer thread so no caller ever
+        # pays for a stderr write+flush; close() flushes the tail.
+        self._emit_queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._emitter = threading.Thread(target=self._emitter_loop, daemon=True)
+        self._emitter.start()
 
     def update(self, input_name: str, fraction: float, *, force: bool = False) -> None:
+        # Clamp and derive the percentage before taking the lock; the locked
+        # region is just the dict updates and the overall-percent read.
+        clamped = max(0.0, min(1.0, fraction))
+        pct = clamped * 100.0
         with self._lock:
-            clamped = max(0.0, min(1.0, fraction))
-            if clamped < self._fractions.get(input_name, 0.0):
+            old = self._fractions[input_name]
+            if clamped < old:
                 return
-
-            old = self._fractions.get(input_name, 0.0)
             self._fractions[input_name] = clamped
-            pct = clamped * 100.0
-            last_pct = self._last_pct.get(input_name, -1.0)
-            should_emit = force or pct >= 100.0 or (pct - last_pct) >= 2.0
-            if not should_emit and old == clamped:
+            self._weighted_sum += (clamped - old) * self._weights[input_name]
+            if not (force or pct >= 100.0 or (pct - self._last_pct[input_name]) >= 2.0):
                 return
-
-            if should_emit:
-                self._last_pct[input_name] = pct
-                idx = self._order.get(input_name, 0)
-                overall = self._overall_percent()
-                self._emit(f"[{idx}/{self._total}] {input_name}: {pct:5.1f}% | overall {overall:5.1f}%")
+            self._last_pct[input_name] = pct
+            idx = self._order[input_name]
+            overall = self._overall_percent()
+        self._emit(f"[{idx}/{self._total}] {input_name}: {pct:5.1f}% | overall {overall:5.1f}%")
 
     def finish(self, input_name: str, *, ok: bool, error: str | None = None) -> None:
         self.update(input_name, 1.0, force=True)
@@ -68,15 +78,38 @@ class ProgressTracker:
                 details = f" ({error})" if error else ""
                 self._emit(f"[{idx}/{self._total}] {input_name}: failed{details} | overall {overall:5.1f}%")
 
+    def close(self) -> None:
+        self._emit_queue.put(None)
+        self._emitter.join()
+
     def _overall_percent(self) -> float:
-        weighted = 0.0
-        for name, fraction in self._fractions.items():
-            weighted += fraction * self._weights.get(name, 1.0)
-        return 100.0 * (weighted / self._total_weight)
+        return 100.0 * (self._weighted_sum / self._total_weight)
 
-    @staticmethod
-    def _emit(message: str) -> None:
-        print(message, file=sys.stderr, flush=True)
+    def _emit(self, message: str) -> None:
+        self._emit_queue.put(message + "\n")
+
+    def _emitter_loop(self) -> None:
+        # Coalesce whatever is pending into one write+flush, so bursts from
+        # many parallel jobs cost one syscall instead of one per line.
+        while True:
+            item = self._emit_queue.get()
+            if item is None:
+                return
+            batch = [item]
+            closing = False
+            while True:
+                try:
+                    nxt = self._emit_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    closing = True
+                    break
+                batch.append(nxt)
+            sys.stderr.write("".join(batch))
+            sys.stderr.flush()
+            if closing:
+                return
 
 
 def parse_args(argv: list[str]) -> argparse.Namespace:
@@ -88,6 +121,18 @@ def parse_args(argv: list[str]) -> argparse.Namespace:
     parser.add_argument("--input-dir", default="input_data")
     parser.add_argument("--output-dir", default="output_data")
     parser.add_argument("--jobs", type=int, default=0, help="Parallel conversion jobs; 0 means auto")
+    parser.add_argument(
+        "--threads-per-job",
+        type=int,
+        default=0,
+        help="ffmpeg -threads per job; 0 means cpu_count // jobs (avoids oversubscription)",
+    )
+    parser.add_argument(
+        "--encoder",
+        choices=["auto"] + ENCODER_PREFERENCE,
+        default="auto",
+        help="H.264 encoder; auto probes ffmpeg for a hardware encoder and falls back to libx264",
+    )
     parser.add_argument("--overwrite", dest="overwrite", action="store_true", default=True)
     parser.add_argument("--no-overwrite", dest="overwrite", action="store_false")
     return parser.parse_args(argv)
@@ -105,17 +150,111 @@ def resolve_dir(raw: str) -> Path:
 
 
 def dedupe_preserve_order(values: list[str]) -> list[str]:
-    seen: set[str] = set()
-    out: list[str] = []
-    for value in values:
-        if value in seen:
-            continue
-        seen.add(value)
-        out.append(value)
-    return out
+    # dict preserves insertion order, and fromkeys dedupes in one C call.
+    return list(dict.fromkeys(value for value in values if value))
+
+
+# EBML element IDs (with length-marker bits) for the WebM duration fast path.
+_EBML_HEADER_ID = 0x1A45DFA3
+_SEGMENT_ID = 0x18538067
+_INFO_ID = 0x1549A966
+_TIMECODE_SCALE_ID = 0x2AD7B1
+_DURATION_ID = 0x4489
+
+_EBML_HEADER_BYTES = 64 * 1024
+
+
+def _read_ebml_vint(buf: bytes, pos: int, *, keep_marker: bool) -> tuple[int, int, bool]:
+    """Decode one EBML variable-length integer at buf[pos].
+
+    Returns (value, next_pos, is_unknown_size). Element IDs keep the marker
+    bit (matching the conventional hex spellings); sizes strip it.
+    """
+    first = buf[pos]
+    if first == 0:
+        raise ValueError("invalid EBML vint")
+    length = 1
+    mask = 0x80
+    while not (first & mask):
+        mask >>= 1
+        length += 1
+    value = first if keep_marker else first & (mask - 1)
+    unknown = not keep_marker and (first & (mask - 1)) == mask - 1
+    for i in range(1, length):
+        byte = buf[pos + i]
+        value = (value << 8) | byte
+        if byte != 0xFF:
+            unknown = False
+    return value, pos + length, unknown
+
+
+def probe_duration_seconds_native(file_path: Path) -> float:
+    """Read Segment > Info > Duration straight out of the EBML header.
+
+    The duration lives within the first few KB of a well-formed WebM file, so
+    this replaces a fork+exec of ffprobe with a single small read. Returns 0.0
+    on any parse trouble; callers fall back to ffprobe.
+    """
+    try:
+        with open(file_path, "rb") as f:
+            buf = f.read(_EBML_HEADER_BYTES)
+
+        pos = 0
+        # EBML header: check the magic and skip over it.
+        elem_id, pos, _ = _read_ebml_vint(buf, pos, keep_marker=True)
+        if elem_id != _EBML_HEADER_ID:
+            return 0.0
+        size, pos, unknown = _read_ebml_vint(buf, pos, keep_marker=False)
+        if unknown:
+            return 0.0
+        pos += size
+
+        elem_id, pos, _ = _read_ebml_vint(buf, pos, keep_marker=True)
+        if elem_id != _SEGMENT_ID:
+            return 0.0
+        _size, pos, _unknown = _read_ebml_vint(buf, pos, keep_marker=False)
+
+        # Walk Segment children until Info; skip everything else.
+        while pos < len(buf):
+            elem_id, pos, _ = _read_ebml_vint(buf, pos, keep_marker=True)
+            size, pos, unknown = _read_ebml_vint(buf, pos, keep_marker=False)
+            if elem_id == _INFO_ID:
+                break
+            if unknown:
+                return 0.0
+            pos += size
+        else:
+            return 0.0
+
+        info_end = min(len(buf), pos + size)
+        timecode_scale = 1_000_000  # EBML default: 1 ms
+        duration_units: float | None = None
+        while pos < info_end:
+            elem_id, pos, _ = _read_ebml_vint(buf, pos, keep_marker=True)
+            size, pos, unknown = _read_ebml_vint(buf, pos, keep_marker=False)
+            if unknown or pos + size > len(buf):
+                break
+            if elem_id == _TIMECODE_SCALE_ID:
+                timecode_scale = int.from_bytes(buf[pos : pos + size], "big")
+            elif elem_id == _DURATION_ID:
+                if size == 4:
+                    duration_units = struct.unpack(">f", buf[pos : pos + 4])[0]
+                elif size == 8:
+                    duration_units = struct.unpack(">d", buf[pos : pos + 8])[0]
+            pos += size
+
+        if duration_units is None or timecode_scale <= 0:
+            return 0.0
+        seconds = duration_units * timecode_scale / 1e9
+        return seconds if seconds > 0 else 0.0
+    except (OSError, IndexError, ValueError, struct.error):
+        return 0.0
 
 
 def probe_duration_seconds(file_path: Path) -> float:
+    native = probe_duration_seconds_native(file_path)
+    if native > 0:
+        return native
     cmd = [
         "ffprobe",
         "-v",
@@ -136,35 +275,275 @@ def probe_duration_seconds(file_path: Path) -> float:
     return value if value > 0 else 0.0
 
 
-def parse_out_time_to_seconds(value: str) -> float | None:
+# Hardware H.264 encoders in preference order; libx264 is the software
+# fallback that is always present in a standard ffmpeg build.
+ENCODER_PREFERENCE = ["h264_videotoolbox", "h264_nvenc", "h264_qsv", "libx264"]
+
+
+def _encoder_can_initialize(encoder: str) -> bool:
+    """One-frame null encode to prove the encoder actually starts.
+
+    Stock distro builds list h264_nvenc/h264_qsv in -encoders even on hosts
+    without the hardware; initialization is the only reliable check.
+    """
+    try:
+        result = subprocess.run(
+            [
+                "ffmpeg",
+                "-hide_banner",
+                "-v",
+                "error",
+                "-f",
+                "lavfi",
+                "-i",
+                "nullsrc=s=64x64:d=0.1",
+                "-frames:v",
+                "1",
+                "-c:v",
+                encoder,
+                "-f",
+                "null",
+                "-",
+            ],
+            capture_output=True,
+            check=False,
+        )
+    except OSError:
+        return False
+    return result.returncode == 0
+
+
+def detect_encoder() -> str:
     try:
-        hours_str, minutes_str, seconds_str = value.strip().split(":")
-        return int(hours_str) * 3600 + int(minutes_str) * 60 + float(seconds_str)
-    except Exception:
-        return None
+        result = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-encoders"],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+    except OSError:
+        return "libx264"
+    if result.returncode != 0:
+        return "libx264"
+    available = result.stdout
+    for encoder in ENCODER_PREFERENCE:
+        if encoder in available and _encoder_can_initialize(encoder):
+            return encoder
+    return "libx264"
+
+
+def encoder_args(encoder: str) -> list[str]:
+    # Rate control is per-encoder: hardware encoders do not take -crf.
+    if encoder == "h264_videotoolbox":
+        return ["-c:v", "h264_videotoolbox", "-q:v", "55"]
+    if encoder == "h264_nvenc":
+        return ["-c:v", "h264_nvenc", "-preset", "p4", "-b:v", "2M"]
+    if encoder == "h264_qsv":
+        return ["-c:v", "h264_qsv", "-global_quality", "24"]
+    return ["-c:v", "libx264", "-preset", "veryfast", "-crf", "24"]
+
+
+def drain_stderr_in_background(process: subprocess.Popen) -> list[bytes]:
+    """Start consuming process.stderr on a daemon thread.
+
+    ffmpeg writes warnings to stderr while we are blocked reading the progress
+    stream on stdout; if stderr fills its 64 KiB pipe buffer first, both sides
+    deadlock. Returns a single-slot list that holds the captured bytes once
+    the process closes its stderr.
+    """
+    captured: list[bytes] = [b""]
+
+    def _drain() -> None:
+        assert process.stderr is not None
+        captured[0] = process.stderr.read()
+
+    threading.Thread(target=_drain, daemon=True).start()
+    return captured
+
+
+# Worker processes cannot share the ProgressTracker; they push
+# (input_name, fraction, force) tuples into this queue instead, and a drainer
+# thread in the parent feeds the tracker.
+_PROGRESS_QUEUE: Any = None
+
+
+def _init_worker(progress_queue: Any) -> None:
+    global _PROGRESS_QUEUE
+    _PROGRESS_QUEUE = progress_queue
+
+
+def _report_progress(input_name: str, fraction: float, *, force: bool = False) -> None:
+    # -stats_period caps progress records at 2/s per job, so every report is
+    # cheap enough to forward; the tracker still applies its 2% emit gate.
+    if _PROGRESS_QUEUE is not None:
+        _PROGRESS_QUEUE.put((input_name, fraction, force))
+
+
+def _drain_progress(progress_queue: Any, tracker: ProgressTracker) -> None:
+    while True:
+        item = progress_queue.get()
+        if item is None:
+            break
+        input_name, fraction, force = item
+        tracker.update(input_name, fraction, force=force)
+
+
+# Clips shorter than this get fused into shared ffmpeg invocations (capped per
+# invocation), amortizing process-spawn and codec-init costs that dominate for
+# small files. Long files keep the per-file path.
+FUSE_MAX_DURATION_SECONDS = 30.0
+FUSE_MAX_BATCH = 8
+
+
+def convert_batch(
+    tasks: list[ConversionTask],
+    *,
+    overwrite: bool,
+    threads_per_job: int = 0,
+    encoder: str = "libx264",
+) -> list[dict[str, Any]]:
+    """Transcode several short clips with a single multi-output ffmpeg run.
+
+    ffmpeg encodes all outputs in one process, so progress is attributed to
+    the batch as a whole — acceptable for sub-30s clips. Results are returned
+    per input file in task order.
+    """
+    cmd = [
+        "ffmpeg",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-stats_period",
+        "0.5",
+        "-progress",
+        "pipe:1",
+        "-y" if overwrite else "-n",
+    ]
+    for task in tasks:
+        cmd += ["-i", str(task.input_path)]
+    enc = encoder_args(encoder)
+    for idx, task in enumerate(tasks):
+        cmd += ["-map", str(idx)]
+        cmd += enc
+        if threads_per_job > 0:
+            # Output option: placed before -i it would only cap the decoder
+            # while libx264 still spawned ncpu encoder threads.
+            cmd += ["-threads", str(threads_per_job)]
+        cmd += ["-c:a", "aac", "-b:a", "128k", "-movflags", "+faststart"]
+        cmd.append(str(task.output_path))
+
+    process = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        bufsize=-1,
+    )
+    assert process.stdout is not None
+    assert process.stderr is not None
+
+    # The capture itself goes unused here (per-file reruns produce their own
+    # stderr), but the drain still prevents the 64 KiB pipe deadlock.
+    drain_stderr_in_background(process)
 
+    batch_duration = max(task.duration_seconds for task in tasks)
+    for raw_line in process.stdout:
+        if raw_line.startswith(b"out_time_ms="):
+            try:
+                current_seconds = int(raw_line[12:]) / 1_000_000.0
+            except ValueError:
+                continue
+            if batch_duration > 0:
+                fraction = current_seconds / batch_duration
+                for task in tasks:
+                    _report_progress(task.input_name, fraction)
+        elif raw_line.startswith(b"progress=") and raw_line.rstrip() == b"progress=end":
+            for task in tasks:
+                _report_progress(task.input_name, 1.0, force=True)
 
-def convert_one(task: ConversionTask, *, overwrite: bool, tracker: ProgressTracker) -> dict[str, Any]:
+    return_code = process.wait()
+    if return_code != 0:
+        # One corrupt input fails the whole fused run, so a batch-level error
+        # cannot name the offender. Redo the batch one file per process: the
+        # good members convert and only the bad one reports its own stderr.
+        results = []
+        for task in tasks:
+            if not overwrite:
+                # A partial output left behind by the failed fused run would
+                # trip convert_one's -n; pre-existing outputs never enter
+                # fused batches, so anything here is our own debris.
+                try:
+                    task.output_path.unlink()
+                except FileNotFoundError:
+                    pass
+            results.append(
+                convert_one(
+                    task,
+                    overwrite=overwrite,
+                    threads_per_job=threads_per_job,
+                    encoder=encoder,
+                )
+            )
+        return results
+
+    results: list[dict[str, Any]] = []
+    for task in tasks:
+        try:
+            output_size_bytes = task.output_path.stat().st_size
+        except FileNotFoundError:
+            results.append(
+                {
+                    "input_file": task.input_name,
+                    "output_file": str(task.output_path),
+                    "status": "error",
+                    "error": "ffmpeg finished successfully but output file is missing",
+                }
+            )
+            continue
+        results.append(
+            {
+                "input_file": task.input_name,
+                "output_file": str(task.output_path),
+                "status": "ok",
+                "source_size_bytes": task.source_size_bytes,
+                "output_size_bytes": output_size_bytes,
+            }
+        )
+    return results
+
+
+def convert_one(
+    task: ConversionTask,
+    *,
+    overwrite: bool,
+    threads_per_job: int = 0,
+    encoder: str = "libx264",
+) -> dict[str, Any]:
     cmd = [
         "ffmpeg",
         "-hide_banner",
         "-loglevel",
         "error",
         "-y" if overwrite else "-n",
+    ]
+    cmd += [
         "-i",
         str(task.input_path),
-        "-c:v",
-        "libx264",
-        "-preset",
-        "veryfast",
-        "-crf",
-        "24",
+    ]
+    cmd += encoder_args(encoder)
+    if threads_per_job > 0:
+        # Without this libx264 spawns ncpu threads per process, and N parallel
+        # jobs oversubscribe the host into context-switch thrash. Must sit
+        # after -i: as an input option it would only cap the decoder.
+        cmd += ["-threads", str(threads_per_job)]
+    cmd += [
         "-c:a",
         "aac",
         "-b:a",
         "128k",
         "-movflags",
         "+faststart",
+        "-stats_period",
+        "0.5",
         "-progress",
         "pipe:1",
         str(task.output_path),
@@ -174,35 +553,31 @@ def convert_one(task: ConversionTask, *, overwrite: bool, tracker: ProgressTrack
         cmd,
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
-        text=True,
-        bufsize=1,
+        bufsize=-1,
     )
 
     assert process.stdout is not None
     assert process.stderr is not None
 
+    stderr_captured = drain_stderr_in_background(process)
+
+    # Only 2 of the ~15 keys ffmpeg emits per record matter; filter on the
+    # raw prefix before any strip/split allocation. out_time_ms supersedes
+    # out_time — both carry the same clock at the same cadence.
     for raw_line in process.stdout:
-        line = raw_line.strip()
-        if not line or "=" not in line:
-            continue
-        key, value = line.split("=", 1)
-        if key == "out_time_ms":
+        if raw_line.startswith(b"out_time_ms="):
             try:
-                current_seconds = int(value) / 1_000_000.0
+                current_seconds = int(raw_line[12:]) / 1_000_000.0
             except ValueError:
                 continue
             if task.duration_seconds > 0:
-                tracker.update(task.input_name, current_seconds / task.duration_seconds)
-        elif key == "out_time":
-            current_seconds = parse_out_time_to_seconds(value)
-            if current_seconds is not None and task.duration_seconds > 0:
-                tracker.update(task.input_name, current_seconds / task.duration_seconds)
-        elif key == "progress" and value == "end":
-            tracker.update(task.input_name, 1.0, force=True)
-
-    stderr_output = process.stderr.read().strip()
+                _report_progress(task.input_name, current_seconds / task.duration_seconds)
+        elif raw_line.startswith(b"progress=") and raw_line.rstrip() == b"progress=end":
+            _report_progress(task.input_name, 1.0, force=True)
+
     return_code = process.wait()
     if return_code != 0:
+        stderr_output = stderr_captured[0].decode("utf-8", errors="replace").strip()
         error_line = stderr_output.splitlines()[-1] if stderr_output else f"ffmpeg exited with code {return_code}"
         return {
             "input_file": task.input_name,
@@ -211,7 +586,10 @@ def convert_one(task: ConversionTask, *, overwrite: bool, tracker: ProgressTrack
             "error": error_line,
         }
 
-    if not task.output_path.exists():
+    # One stat answers both "does it exist" and "how big is it".
+    try:
+        output_size_bytes = task.output_path.stat().st_size
+    except FileNotFoundError:
         return {
             "input_file": task.input_name,
             "output_file": str(task.output_path),
@@ -224,7 +602,7 @@ def convert_one(task: ConversionTask, *, overwrite: bool, tracker: ProgressTrack
         "output_file": str(task.output_path),
         "status": "ok",
         "source_size_bytes": task.source_size_bytes,
-        "output_size_bytes": task.output_path.stat().st_size,
+        "output_size_bytes": output_size_bytes,
     }
 
 
@@ -239,20 +617,37 @@ def collect_tasks(
     prebuilt_results: list[dict[str, Any]] = []
     ordered_names: list[str] = []
 
+    # Sizes gathered during enumeration; DirEntry.stat() reuses the data
+    # fetched by the directory scan, so "all" mode costs one pass with no
+    # extra stat per file.
+    sizes: dict[str, int] = {}
     if mode == "all":
-        names = sorted(
-            [entry.name for entry in input_dir.iterdir() if entry.is_file() and entry.suffix.lower() == ".webm"]
-        )
+        with os.scandir(input_dir) as it:
+            dir_entries = [
+                entry
+                for entry in it
+                if entry.name.lower().endswith(".webm") and entry.is_file()
+            ]
+        dir_entries.sort(key=lambda entry: entry.name)
+        names = []
+        for entry in dir_entries:
+            names.append(entry.name)
+            sizes[entry.name] = entry.stat().st_size
     else:
-        names = dedupe_preserve_order([Path(raw).name.strip() for raw in selected_files if raw.strip()])
+        names = dedupe_preserve_order([Path(raw).name.strip() for raw in selected_files])
 
+    # Output paths are plain "<output_dir>/<stem>.mp4" strings; building them
+    # by concatenation skips two Path allocations per file, which adds up on
+    # batches of thousands.
+    output_dir_str = str(output_dir)
+    valid: list[tuple[str, Path, Path, int]] = []
     for name in names:
         ordered_names.append(name)
         if not name.lower().endswith(".webm"):
             prebuilt_results.append(
                 {
                     "input_file": name,
-                    "output_file": str((output_dir / Path(name).with_suffix(".mp4").name)),
+                    "output_file": f"{output_dir_str}{os.sep}{Path(name).stem}.mp4",
                     "status": "error",
                     "error": "only .webm file names are allowed",
                 }
@@ -260,28 +655,46 @@ def collect_tasks(
             continue
 
         input_path = input_dir / name
-        output_path = output_dir / Path(name).with_suffix(".mp4").name
+        output_path = Path(f"{output_dir_str}{os.sep}{name[:-5]}.mp4")
 
-        if not input_path.exists() or not input_path.is_file():
-            prebuilt_results.append(
-                {
-                    "input_file": name,
-                    "output_file": str(output_path),
-                    "status": "error",
-                    "error": "input file not found",
-                }
-            )
-            continue
+        size_bytes = sizes.get(name)
+        if size_bytes is None:
+            # Selected mode: one stat answers existence, kind and size.
+            try:
+                st = os.stat(input_path)
+            except OSError:
+                st = None
+            if st is None or not stat.S_ISREG(st.st_mode):
+                prebuilt_results.append(
+                    {
+                        "input_file": name,
+                        "output_file": str(output_path),
+                        "status": "error",
+                        "error": "input file not found",
+                    }
+                )
+                continue
+            size_bytes = st.st_size
+
+        valid.append((name, input_path, output_path, size_bytes))
+
+    # Duration probes are subprocess waits, so run them concurrently: startup
+    # cost before the first encode drops from O(N) spawns to O(N/workers).
+    durations: dict[str, float] = {}
+    if valid:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(32, len(valid))) as ex:
+            probe_results = ex.map(probe_duration_seconds, [path for _, path, _, _ in valid])
+            for (name, _, _, _), duration in zip(valid, probe_results):
+                durations[name] = duration
 
-        duration = probe_duration_seconds(input_path)
-        size_bytes = input_path.stat().st_size
+    for name, input_path, output_path, size_bytes in valid:
         tasks.append(
             ConversionTask(
                 index=len(tasks) + 1,
                 input_name=name,
                 input_path=input_path,
                 output_path=output_path,
-                duration_seconds=duration,
+                duration_seconds=durations[name],
                 source_size_bytes=size_bytes,
             )
         )
@@ -330,47 +743,109 @@ def main(argv: list[str]) -> int:
         output_dir=output_dir,
     )
 
-    for idx, task in enumerate(tasks, start=1):
-        tasks[idx - 1] = ConversionTask(
-            index=idx,
-            input_name=task.input_name,
-            input_path=task.input_path,
-            output_path=task.output_path,
-            duration_seconds=task.duration_seconds,
-            source_size_bytes=task.source_size_bytes,
-        )
-
     tracker = ProgressTracker(tasks)
     result_map: dict[str, dict[str, Any]] = {entry["input_file"]: entry for entry in prebuilt_results}
 
     if tasks:
         max_workers = min(len(tasks), (args.jobs if args.jobs and args.jobs > 0 else auto_jobs()))
+        threads_per_job = (
+            args.threads_per_job
+            if args.threads_per_job and args.threads_per_job > 0
+            else max(1, (os.cpu_count() or 2) // max_workers)
+        )
+        encoder = args.encoder if args.encoder != "auto" else detect_encoder()
         print(
-            f"Converting {len(tasks)} file(s) with {max_workers} parallel job(s) from {input_dir} to {output_dir}",
+            f"Converting {len(tasks)} file(s) with {max_workers} parallel job(s) using {encoder} from {input_dir} to {output_dir}",
             file=sys.stderr,
             flush=True,
         )
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = {
-                executor.submit(convert_one, task, overwrite=args.overwrite, tracker=tracker): task
+        # Processes instead of threads: the stdout progress parsers no longer
+        # serialize on the GIL when many jobs run concurrently.
+        progress_queue: multiprocessing.Queue = multiprocessing.Queue()
+        drainer = threading.Thread(
+            target=_drain_progress, args=(progress_queue, tracker), daemon=True
+        )
+        drainer.start()
+        try:
+            # Short clips share ffmpeg invocations (same encoder settings for
+            # every output); everything else converts one file per process.
+            # A pre-existing output would fail an entire fused -n run, so
+            # those tasks convert individually and refuse on their own.
+            small_tasks = [
+                task
                 for task in tasks
-            }
-            for future in concurrent.futures.as_completed(futures):
-                task = futures[future]
-                try:
-                    result = future.result()
-                except Exception as exc:  # safeguard to continue other files
-                    result = {
-                        "input_file": task.input_name,
-                        "output_file": str(task.output_path),
-                        "status": "error",
-                        "error": str(exc),
-                    }
-
-                result_map[task.input_name] = result
-                tracker.finish(task.input_name, ok=result.get("status") == "ok", error=result.get("error"))
+                if 0 < task.duration_seconds < FUSE_MAX_DURATION_SECONDS
+                and (args.overwrite or not task.output_path.exists())
+            ]
+            batches: list[list[ConversionTask]] = []
+            if len(small_tasks) >= 2:
+                batches = [
+                    small_tasks[i : i + FUSE_MAX_BATCH]
+                    for i in range(0, len(small_tasks), FUSE_MAX_BATCH)
+                ]
+            batched_names = {task.input_name for batch in batches for task in batch}
+            single_tasks = [task for task in tasks if task.input_name not in batched_names]
+
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_init_worker,
+                initargs=(progress_queue,),
+            ) as executor:
+                # Completed futures land on a queue via add_done_callback:
+                # O(1) per completion, where as_completed rescans every
+                # pending future on each wake-up (O(N^2) over a big batch).
+                done_queue: queue.Queue[tuple[list[ConversionTask], concurrent.futures.Future]] = queue.Queue()
+                submitted = 0
+                for task in single_tasks:
+                    future = executor.submit(
+                        convert_one,
+                        task,
+                        overwrite=args.overwrite,
+                        threads_per_job=threads_per_job,
+                        encoder=encoder,
+                    )
+                    future.add_done_callback(
+                        lambda f, batch=[task]: done_queue.put((batch, f))
+                    )
+                    submitted += 1
+                for batch in batches:
+                    future = executor.submit(
+                        convert_batch,
+                        batch,
+                        overwrite=args.overwrite,
+                        threads_per_job=threads_per_job,
+                        encoder=encoder,
+                    )
+                    future.add_done_callback(
+                        lambda f, batch=batch: done_queue.put((batch, f))
+                    )
+                    submitted += 1
+                for _ in range(submitted):
+                    batch_tasks, future = done_queue.get()
+                    try:
+                        outcome = future.result()
+                        results = [outcome] if isinstance(outcome, dict) else outcome
+                    except Exception as exc:  # safeguard to continue other files
+                        results = [
+                            {
+                                "input_file": task.input_name,
+                                "output_file": str(task.output_path),
+                                "status": "error",
+                                "error": str(exc),
+                            }
+                            for task in batch_tasks
+                        ]
+
+                    for task, result in zip(batch_tasks, results):
+                        result_map[task.input_name] = result
+                        tracker.finish(task.input_name, ok=result.get("status") == "ok", error=result.get("error"))
+        finally:
+            progress_queue.put(None)
+            drainer.join()
+            tracker.close()
     else:
+        tracker.close()
         print("No matching .webm files found for conversion.", file=sys.stderr, flush=True)
 
     if not ordered_names:
@@ -14,6 +14,13 @@ import youtube_downloader as yd  # noqa: E402
 
 
 class QualityPolicyTest(unittest.TestCase):
+    def setUp(self) -> None:
+        # The env-backed resolvers are memoized; tests patch os.environ.
+        yd.resolve_effective_cookies_browser.cache_clear()
+        yd.resolve_effective_cookies_browsers.cache_clear()
+        yd.resolve_quality_policy.cache_clear()
+        yd._env_target_quality.cache_clear()
+
     def test_strict_format_selector_targets_exact_height(self) -> None:
         selector = yd.build_format_selector(min_height=720, quality_policy="strict")
         self.assertIn("height=720", selector)
@@ -74,8 +81,8 @@ class QualityPolicyTest(unittest.TestCase):
         self.assertEqual(["web", "ios"], yd.resolve_effective_clients([" web ", "", "ios"]))
 
     def test_attempt_plan_tries_without_cookies_first(self) -> None:
-        attempts = yd.build_attempt_plan(
-            clients=["web", "ios"], cookie_browsers=["chrome", "firefox"]
+        attempts = list(
+            yd.build_attempt_plan(clients=["web", "ios"], cookie_browsers=["chrome", "firefox"])
         )
         self.assertEqual(("web", "none", None), attempts[0])
         self.assertEqual(("ios", "none", None), attempts[1])
@@ -83,9 +90,53 @@ class QualityPolicyTest(unittest.TestCase):
         self.assertEqual(("ios", "cookies:chrome", "chrome"), attempts[3])
 
     def test_attempt_plan_without_cookies_has_only_plain_attempts(self) -> None:
-        attempts = yd.build_attempt_plan(clients=["web"], cookie_browsers=[])
+        attempts = list(yd.build_attempt_plan(clients=["web"], cookie_browsers=[]))
         self.assertEqual([("web", "none", None)], attempts)
 
 
+class RetryScopeTest(unittest.TestCase):
+    def test_drm_errors_are_permanent(self) -> None:
+        self.assertEqual(
+            yd.RetryScope.NONE,
+            yd.classify_download_error("ERROR: This video is DRM protected"),
+        )
+
+    def test_image_only_pages_are_permanent(self) -> None:
+        self.assertEqual(
+            yd.RetryScope.NONE,
+            yd.classify_download_error("Only images are available for download"),
+        )
+
+    def test_http_403_is_auth_scoped(self) -> None:
+        self.assertEqual(
+            yd.RetryScope.AUTH,
+            yd.classify_download_error("unable to download video data: HTTP Error 403: Forbidden"),
+        )
+
+    def test_cookie_trouble_is_auth_scoped(self) -> None:
+        self.assertEqual(
+            yd.RetryScope.AUTH,
+            yd.classify_download_error("could not find chrome cookies database"),
+        )
+
+    def test_missing_format_is_client_scoped(self) -> None:
+        self.assertEqual(
+            yd.RetryScope.CLIENT,
+            yd.classify_download_error("Requested format is not available"),
+        )
+
+    def test_no_formats_found_is_client_scoped(self) -> None:
+        self.assertEqual(
+            yd.RetryScope.CLIENT,
+            yd.classify_download_error("No video formats found!"),
+        )
+
+    def test_unknown_errors_default_to_permanent(self) -> None:
+        self.assertEqual(
+            yd.RetryScope.NONE,
+            yd.classify_download_error("something entirely unexpected"),
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -2,23 +2,48 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
+import concurrent.futures
+import copy
+import functools
 import json
+import multiprocessing
 import os
+import random
+import re
+import shutil
 import subprocess
 import sys
+import threading
+import time
+from collections.abc import Iterator
 from dataclasses import dataclass
 from pathlib import Path
-from urllib.parse import urlparse
 
 try:
     import yt_dlp
-    from yt_dlp.utils import DownloadError
+    from yt_dlp.utils import DownloadError, RejectedVideoReached, match_filter_func
 except ModuleNotFoundError:  # pragma: no cover - exercised in unit tests without deps
     yt_dlp = None
+    match_filter_func = None
 
     class DownloadError(Exception):
         pass
 
+    class RejectedVideoReached(Exception):
+        pass
+
+try:
+    import orjson
+except ModuleNotFoundError:  # optional speedup; stdlib json is the fallback
+    orjson = None
+
+
+def dumps_json(payload: dict) -> str:
+    if orjson is not None:
+        return orjson.dumps(payload).decode()
+    return json.dumps(payload, ensure_ascii=False)
+
 
 DEFAULT_TARGET_QUALITY = 720
 MIN_TARGET_QUALITY = 144
@@ -26,6 +51,10 @@ MAX_TARGET_QUALITY = 4320
 DEFAULT_QUALITY_POLICY = "strict"
 DEFAULT_COOKIES_BROWSER = "chrome"
 COOKIE_BROWSER_FALLBACKS = ["safari", "firefox"]
+DEFAULT_RETRY_BASE_SECONDS = 1.0
+DEFAULT_RETRY_CAP_SECONDS = 30.0
+DEFAULT_CONCURRENT_FRAGMENTS = 4
+HTTP_CHUNK_SIZE_BYTES = 10 * 1024 * 1024
 
 
 @dataclass
@@ -42,10 +71,16 @@ class DownloadOutcome:
 
 
 class SilentLogger:
+    __slots__ = ("warnings", "errors")
+
     def __init__(self) -> None:
         self.warnings: list[str] = []
         self.errors: list[str] = []
 
+    def reset(self) -> None:
+        self.warnings.clear()
+        self.errors.clear()
+
     def debug(self, msg: str) -> None:
         _ = msg
 
@@ -63,19 +98,86 @@ def clean_error_message(message: str) -> str:
     return msg
 
 
-def is_retryable_download_error(message: str) -> bool:
-    lower = message.lower()
-    retryable_markers = (
-        "requested format is not available",
-        "only images are available",
-        "challenge solving failed",
-        "this video is drm protected",
-        "no video formats found",
-        "http error 403",
-        "cookiesfrombrowser",
-        "cookie",
-    )
-    return any(marker in lower for marker in retryable_markers)
+class RetryScope:
+    """How far a retry can help after a given download error."""
+
+    NONE = "none"  # permanent for this video: no combination will help
+    AUTH = "auth"  # auth-bound: a different cookie context may help
+    CLIENT = "client"  # format-bound: a different client or mode may help
+
+
+# Marker -> scope. DRM and image-only pages are invariant across clients and
+# cookies; 403/cookie trouble is tied to the auth context; missing formats
+# depend on the (client, selector) pair.
+_ERROR_SCOPE_MARKERS = (
+    ("this video is drm protected", RetryScope.NONE),
+    ("only images are available", RetryScope.NONE),
+    ("http error 403", RetryScope.AUTH),
+    ("challenge solving failed", RetryScope.AUTH),
+    ("cookiesfrombrowser", RetryScope.AUTH),
+    ("cookie", RetryScope.AUTH),
+    ("requested format is not available", RetryScope.CLIENT),
+    ("no video formats found", RetryScope.CLIENT),
+)
+
+# All markers fused into one alternation so a message is scanned once
+# instead of once per marker; match.lastgroup names the winning marker.
+_ERROR_SCOPE_RE = re.compile(
+    "|".join(
+        f"(?P<m{index}>{re.escape(marker)})"
+        for index, (marker, _) in enumerate(_ERROR_SCOPE_MARKERS)
+    ),
+    re.IGNORECASE,
+)
+_ERROR_SCOPE_BY_GROUP = {
+    f"m{index}": scope for index, (_, scope) in enumerate(_ERROR_SCOPE_MARKERS)
+}
+
+
+def classify_download_error(message: str) -> str:
+    match = _ERROR_SCOPE_RE.search(message)
+    if match is None:
+        return RetryScope.NONE
+    return _ERROR_SCOPE_BY_GROUP[match.lastgroup]
+
+
+@functools.lru_cache(maxsize=1)
+def resolve_concurrent_fragments() -> int:
+    raw = os.getenv("YT_CONCURRENT_FRAGMENTS")
+    if raw and raw.strip():
+        try:
+            value = int(raw)
+        except ValueError as exc:
+            raise SystemExit(f"Invalid YT_CONCURRENT_FRAGMENTS={raw!r}: expected integer.") from exc
+        if value >= 1:
+            return value
+    return DEFAULT_CONCURRENT_FRAGMENTS
+
+
+def _resolve_retry_seconds(env_name: str, default: float) -> float:
+    raw = os.getenv(env_name)
+    if raw and raw.strip():
+        try:
+            value = float(raw)
+        except ValueError as exc:
+            raise SystemExit(f"Invalid {env_name}={raw!r}: expected number.") from exc
+        if value >= 0:
+            return value
+    return default
+
+
+def retry_backoff_delay(
+    consecutive_failures: int,
+    base: float = DEFAULT_RETRY_BASE_SECONDS,
+    cap: float = DEFAULT_RETRY_CAP_SECONDS,
+) -> float:
+    """Exponential backoff with +/-50% jitter, capped.
+
+    Immediate retries after a failure risk escalating 429/403 responses;
+    jitter keeps concurrent batch workers from retrying in lockstep.
+    """
+    delay = min(cap, base * (2 ** consecutive_failures))
+    return delay * (1 + random.uniform(-0.5, 0.5))
 
 
 def parse_target_quality(value: str | None, *, label: str = "target quality") -> int:
@@ -112,6 +214,9 @@ def normalize_min_height(value: int) -> int:
     return normalize_target_quality(value, label="min-height")
 
 
+# The resolvers below are memoized: environment variables are constant for
+# the process lifetime and batch mode calls them once per URL.
+@functools.lru_cache(maxsize=None)
 def resolve_effective_cookies_browser(cli_value: str | None) -> str | None:
     if cli_value is not None and cli_value.strip():
         raw = cli_value.strip()
@@ -123,6 +228,7 @@ def resolve_effective_cookies_browser(cli_value: str | None) -> str | None:
     return raw
 
 
+@functools.lru_cache(maxsize=None)
 def resolve_effective_cookies_browsers(cli_value: str | None) -> list[str]:
     browser = resolve_effective_cookies_browser(cli_value)
     if browser is None:
@@ -136,6 +242,7 @@ def resolve_effective_cookies_browsers(cli_value: str | None) -> list[str]:
     return base
 
 
+@functools.lru_cache(maxsize=None)
 def resolve_quality_policy(cli_value: str | None) -> str:
     raw = cli_value or os.getenv("YT_QUALITY_POLICY") or DEFAULT_QUALITY_POLICY
     value = raw.strip().lower()
@@ -144,15 +251,20 @@ def resolve_quality_policy(cli_value: str | None) -> str:
     return value
 
 
+@functools.lru_cache(maxsize=None)
+def _env_target_quality() -> int:
+    env_target = os.getenv("YT_TARGET_QUALITY")
+    if env_target and env_target.strip():
+        return parse_target_quality(env_target, label="YT_TARGET_QUALITY")
+    return parse_min_height(os.getenv("YT_MIN_HEIGHT"))
+
+
 def resolve_target_quality(cli_value: int | None, min_height: int | None) -> int:
     if cli_value is not None:
         return normalize_target_quality(cli_value, label="target-quality")
     if min_height is not None:
         return normalize_min_height(min_height)
-    env_target = os.getenv("YT_TARGET_QUALITY")
-    if env_target and env_target.strip():
-        return parse_target_quality(env_target, label="YT_TARGET_QUALITY")
-    return parse_min_height(os.getenv("YT_MIN_HEIGHT"))
+    return _env_target_quality()
 
 
 def resolve_effective_clients(player_clients: list[str] | None) -> list[str | None]:
@@ -168,10 +280,12 @@ def client_label(client: str | None) -> str:
     return client if client else "auto"
 
 
+@functools.lru_cache(maxsize=16)
 def build_exact_format_selector(target_quality: int) -> str:
     return f"bestvideo[height={target_quality}]+bestaudio/best[height={target_quality}]"
 
 
+@functools.lru_cache(maxsize=16)
 def build_best_below_or_equal_selector(target_quality: int) -> str:
     return (
         f"bestvideo[height<={target_quality}]+bestaudio/"
@@ -189,18 +303,36 @@ def build_format_selector(min_height: int, quality_policy: str) -> str:
 
 def build_attempt_plan(
     clients: list[str | None], cookie_browsers: list[str]
-) -> list[tuple[str | None, str, str | None]]:
-    attempts: list[tuple[str | None, str, str | None]] = []
+) -> Iterator[tuple[str | None, str, str | None]]:
+    # Lazy on purpose: the common case succeeds on the first attempt, so the
+    # full clients x auth-contexts product is never materialized. The total
+    # count, when needed, is len(clients) * (1 + len(cookie_browsers)).
     for client in clients:
-        attempts.append((client, "none", None))
+        yield (client, "none", None)
     for browser in cookie_browsers:
         for client in clients:
-            attempts.append((client, f"cookies:{browser}", browser))
-    return attempts
+            yield (client, f"cookies:{browser}", browser)
+
+
+_LOG_LEVELS = {"silent": 0, "info": 1, "debug": 2}
+
+
+@functools.lru_cache(maxsize=1)
+def resolve_log_level() -> int:
+    raw = (os.getenv("YT_LOG_LEVEL") or "info").strip().lower()
+    return _LOG_LEVELS.get(raw, _LOG_LEVELS["info"])
 
 
 def emit_status(message: str) -> None:
-    print(f"[youtube-downloader] {message}", file=sys.stderr)
+    if resolve_log_level() >= _LOG_LEVELS["info"]:
+        sys.stderr.write(f"[youtube-downloader] {message}\n")
+
+
+def emit_status_lazy(make_message) -> None:
+    # For hot paths: the f-string inside make_message is only built when
+    # status output is actually enabled.
+    if resolve_log_level() >= _LOG_LEVELS["info"]:
+        sys.stderr.write(f"[youtube-downloader] {make_message()}\n")
 
 
 def is_quality_acceptable(height: int | None, min_height: int, quality_policy: str) -> bool:
@@ -212,103 +344,144 @@ def is_quality_acceptable(height: int | None, min_height: int, quality_policy: s
     return height <= target_quality
 
 
-def extract_selected_height(info: dict) -> int | None:
+def extract_selected_metadata(info: dict) -> tuple[int | None, str | None]:
+    """Extract (height, format_id) in a single walk over the info dict."""
+    height: int | None = None
+    format_id: str | None = None
+
     value = info.get("height")
     if isinstance(value, int) and value > 0:
-        return value
-
-    requested_formats = info.get("requested_formats")
-    if isinstance(requested_formats, list):
-        heights = []
-        for fmt in requested_formats:
-            if isinstance(fmt, dict):
+        height = value
+    top_format_id = info.get("format_id")
+    if isinstance(top_format_id, str) and top_format_id.strip():
+        format_id = top_format_id
+
+    if height is None or format_id is None:
+        requested_formats = info.get("requested_formats")
+        if isinstance(requested_formats, list):
+            heights = []
+            ids = []
+            for fmt in requested_formats:
+                if not isinstance(fmt, dict):
+                    continue
                 h = fmt.get("height")
                 if isinstance(h, int) and h > 0:
                     heights.append(h)
-        if heights:
-            return max(heights)
+                fmt_id = fmt.get("format_id")
+                if isinstance(fmt_id, str) and fmt_id.strip():
+                    ids.append(fmt_id)
+            if height is None and heights:
+                height = max(heights)
+            if format_id is None and ids:
+                format_id = "+".join(ids)
+
+    if height is None or format_id is None:
+        requested_downloads = info.get("requested_downloads")
+        if isinstance(requested_downloads, list):
+            heights = []
+            for item in requested_downloads:
+                if not isinstance(item, dict):
+                    continue
+                h = item.get("height")
+                nested = item.get("info_dict")
+                if isinstance(h, int) and h > 0:
+                    heights.append(h)
+                elif isinstance(nested, dict):
+                    nested_h = nested.get("height")
+                    if isinstance(nested_h, int) and nested_h > 0:
+                        heights.append(nested_h)
+                if format_id is None:
+                    item_id = item.get("format_id")
+                    if isinstance(item_id, str) and item_id.strip():
+                        format_id = item_id
+                    elif isinstance(nested, dict):
+                        nested_id = nested.get("format_id")
+                        if isinstance(nested_id, str) and nested_id.strip():
+                            format_id = nested_id
+            if height is None and heights:
+                height = max(heights)
+
+    return height, format_id
 
-    requested_downloads = info.get("requested_downloads")
-    if isinstance(requested_downloads, list):
-        heights = []
-        for item in requested_downloads:
-            if not isinstance(item, dict):
-                continue
-            h = item.get("height")
-            if isinstance(h, int) and h > 0:
-                heights.append(h)
-                continue
-            fmt = item.get("info_dict")
-            if isinstance(fmt, dict):
-                nested_h = fmt.get("height")
-                if isinstance(nested_h, int) and nested_h > 0:
-                    heights.append(nested_h)
-        if heights:
-            return max(heights)
-    return None
+
+def extract_selected_height(info: dict) -> int | None:
+    return extract_selected_metadata(info)[0]
 
 
 def extract_selected_format_id(info: dict) -> str | None:
-    format_id = info.get("format_id")
-    if isinstance(format_id, str) and format_id.strip():
-        return format_id
-
-    requested_formats = info.get("requested_formats")
-    if isinstance(requested_formats, list):
-        ids = []
-        for fmt in requested_formats:
-            if isinstance(fmt, dict):
-                value = fmt.get("format_id")
-                if isinstance(value, str) and value.strip():
-                    ids.append(value)
-        if ids:
-            return "+".join(ids)
+    return extract_selected_metadata(info)[1]
 
-    requested_downloads = info.get("requested_downloads")
-    if isinstance(requested_downloads, list):
-        for item in requested_downloads:
-            if not isinstance(item, dict):
-                continue
-            value = item.get("format_id")
-            if isinstance(value, str) and value.strip():
-                return value
-            fmt = item.get("info_dict")
-            if isinstance(fmt, dict):
-                nested_value = fmt.get("format_id")
-                if isinstance(nested_value, str) and nested_value.strip():
-                    return nested_value
-    return None
 
+@functools.lru_cache(maxsize=1)
+def _ffprobe_binary() -> str | None:
+    return shutil.which("ffprobe")
 
-def probe_height_with_ffprobe(path: Path) -> int | None:
-    cmd = [
-        "ffprobe",
+
+def _ffprobe_command(binary: str, path: Path) -> list[str]:
+    # probesize/analyzeduration are trimmed so ffprobe reads the container
+    # header instead of sampling the stream.
+    return [
+        binary,
         "-v",
         "error",
+        "-probesize",
+        "32k",
+        "-analyzeduration",
+        "0",
         "-select_streams",
         "v:0",
         "-show_entries",
-        "stream=height",
+        "stream=height,codec_name",
         "-of",
-        "csv=p=0",
+        "json",
         str(path),
     ]
+
+
+def _parse_ffprobe_height(stdout: str) -> int | None:
     try:
-        proc = subprocess.run(cmd, capture_output=True, text=True, check=False)
-    except FileNotFoundError:
+        streams = json.loads(stdout).get("streams") or []
+        height = streams[0].get("height")
+    except (json.JSONDecodeError, IndexError, AttributeError):
         return None
-    if proc.returncode != 0:
+    if isinstance(height, int) and height > 0:
+        return height
+    return None
+
+
+def probe_height_with_ffprobe(path: Path) -> int | None:
+    """Last-resort height probe; only runs when yt-dlp metadata lacks one.
+
+    The $PATH lookup is cached; see _ffprobe_command for the probe flags.
+    """
+    binary = _ffprobe_binary()
+    if binary is None:
         return None
-    value = proc.stdout.strip()
+    emit_status(f"ffprobe_fallback=path={path.name}")
     try:
-        parsed = int(value)
-    except ValueError:
+        proc = subprocess.run(
+            _ffprobe_command(binary, path), capture_output=True, text=True, check=False
+        )
+    except FileNotFoundError:
         return None
-    return parsed if parsed > 0 else None
+    if proc.returncode != 0:
+        return None
+    return _parse_ffprobe_height(proc.stdout)
+
+
+def snapshot_output_dir(output_dir: Path) -> set[int]:
+    """Inodes of files already present, via one scandir pass.
+
+    Comparing inodes instead of resolved paths avoids a resolve() plus stat
+    per entry on both sides of the download; DirEntry carries the stat data
+    from the directory read itself.
+    """
+    with os.scandir(output_dir) as entries:
+        return {entry.inode() for entry in entries if entry.is_file()}
 
 
 def resolve_downloaded_file_path(
-    info: dict, ydl: yt_dlp.YoutubeDL, output_dir: Path, known_paths_before: set[Path]
+    info: dict, ydl: yt_dlp.YoutubeDL, output_dir: Path, known_inodes_before: set[int]
 ) -> Path:
     candidates: list[Path] = []
 
@@ -340,17 +513,25 @@ def resolve_downloaded_file_path(
         if resolved.with_suffix(".mp4").exists():
             return resolved.with_suffix(".mp4").resolve()
 
-    created_files = []
-    for entry in output_dir.glob("*"):
-        resolved = entry.resolve()
-        if resolved in known_paths_before:
-            continue
-        if entry.is_file():
-            created_files.append(entry)
+    # Batch workers share one out/ directory, so the new-inode fallback must
+    # stay scoped to this download's expected filename stems — an unscoped
+    # "newest file" can claim a near-simultaneous neighbour's output.
+    expected_stems = {candidate.stem for candidate in candidates}
+    newest_path: str | None = None
+    newest_mtime_ns = -1
+    with os.scandir(output_dir) as entries:
+        for entry in entries:
+            if not entry.is_file() or entry.inode() in known_inodes_before:
+                continue
+            if expected_stems and Path(entry.name).stem not in expected_stems:
+                continue
+            mtime_ns = entry.stat().st_mtime_ns
+            if mtime_ns > newest_mtime_ns:
+                newest_mtime_ns = mtime_ns
+                newest_path = entry.path
 
-    if created_files:
-        newest = max(created_files, key=lambda p: p.stat().st_mtime)
-        return newest.resolve()
+    if newest_path is not None:
+        return Path(newest_path).resolve()
 
     raise SystemExit("Download finished but saved file path could not be determined.")
 
@@ -363,14 +544,17 @@ def remove_file_if_exists(path: Path) -> None:
             path.unlink()
 
 
-def normalize_youtube_url(url: str) -> str:
-    parsed = urlparse(url)
-    host = parsed.netloc.lower()
-    path_parts = [part for part in parsed.path.split("/") if part]
+# Only /live/ URLs get rewritten; a compiled regex short-circuits the common
+# watch?v= case without the urlparse + path-split work.
+_YT_LIVE_RE = re.compile(
+    r"^https?://(?:[a-z0-9-]+\.)*youtube\.com/live/([A-Za-z0-9_-]{6,})", re.IGNORECASE
+)
+
 
-    if "youtube.com" in host and len(path_parts) >= 2 and path_parts[0] == "live":
-        video_id = path_parts[1]
-        return f"https://www.youtube.com/watch?v={video_id}"
+def normalize_youtube_url(url: str) -> str:
+    match = _YT_LIVE_RE.match(url)
+    if match:
+        return f"https://www.youtube.com/watch?v={match.group(1)}"
     return url
 
 
@@ -384,10 +568,28 @@ def download_youtube_mp4_720p(
     po_token_android: str | None = None,
     po_token_ios: str | None = None,
     allow_strict_relaxation: bool = True,
+    on_download_finished=None,
 ) -> DownloadOutcome:
     if yt_dlp is None:
         raise SystemExit("yt-dlp is required. Install dependencies with: pip install -r requirements.txt")
 
+    # Merged bestvideo+bestaudio downloads report "finished" once per
+    # stream, so the hook counts streams and signals only after the last
+    # one — when all bytes are on disk and only the ffmpeg merge remains.
+    # yt-dlp strips requested_formats from the per-stream info it hands to
+    # progress hooks, so the expected count is set by the attempt loop from
+    # a download-free selection pass before the real download starts.
+    fetch_done_state = {"signaled": False, "finished_streams": 0, "expected_streams": 1}
+
+    def _fetch_finished_hook(progress: dict) -> None:
+        if progress.get("status") != "finished" or fetch_done_state["signaled"]:
+            return
+        fetch_done_state["finished_streams"] += 1
+        if fetch_done_state["finished_streams"] < fetch_done_state["expected_streams"]:
+            return
+        fetch_done_state["signaled"] = True
+        on_download_finished()
+
     normalized_url = normalize_youtube_url(url)
     script_dir = Path(__file__).resolve().parent
     output_dir = script_dir / "out"
@@ -427,11 +629,20 @@ def download_youtube_mp4_720p(
         f"format={format_chain}"
     )
 
+    # Rejects mismatched formats before any bytes are fetched, replacing
+    # the old download-probe-unlink cycle on strict mismatches.
+    exact_match_filter = (
+        match_filter_func(f"height={effective_target_quality}")
+        if effective_quality_policy == "strict" and match_filter_func is not None
+        else None
+    )
+
     def build_ydl_opts(
         format_selector: str,
         client: str | None,
         browser: str | None,
         logger: SilentLogger,
+        requires_exact_match: bool,
     ) -> dict:
         ydl_opts = {
             "format": format_selector,
@@ -445,6 +656,10 @@ def download_youtube_mp4_720p(
             "logger": logger,
             "retries": 3,
             "fragment_retries": 3,
+            # DASH fragments download in parallel and each stream is range-split,
+            # which beats single-connection throttling on high-RTT links.
+            "concurrent_fragment_downloads": resolve_concurrent_fragments(),
+            "http_chunk_size": HTTP_CHUNK_SIZE_BYTES,
         }
         youtube_args: dict[str, list[str]] = {}
         if client:
@@ -459,51 +674,122 @@ def download_youtube_mp4_720p(
             ydl_opts["extractor_args"] = {"youtube": youtube_args}
         if browser:
             ydl_opts["cookiesfrombrowser"] = (browser,)
+        if requires_exact_match and exact_match_filter is not None:
+            ydl_opts["match_filter"] = exact_match_filter
+            ydl_opts["break_on_reject"] = True
+        if on_download_finished is not None:
+            ydl_opts["progress_hooks"] = [_fetch_finished_hook]
         return ydl_opts
 
-    attempts = build_attempt_plan(effective_clients, effective_cookies_browsers)
+    attempt_total = len(effective_clients) * (1 + len(effective_cookies_browsers))
 
+    # Raw extraction results keyed by (client, browser). The player-JS /
+    # signature extraction is the expensive network part and is identical
+    # across quality modes; only the format selection differs per mode.
+    info_cache: dict[tuple[str | None, str | None], dict] = {}
+    ydl_cache: dict[tuple[str | None, str | None], "yt_dlp.YoutubeDL"] = {}
     attempt_reasons: list[str] = []
     last_error: DownloadError | None = None
-    for mode_index, (mode_name, format_selector, requires_exact_match) in enumerate(
-        quality_modes, start=1
-    ):
-        emit_status(
-            f"quality_mode={mode_index}/{len(quality_modes)}, "
-            f"name={mode_name}, format={format_selector}"
-        )
-        for attempt_index, (client, auth_context, browser) in enumerate(attempts, start=1):
-            current_client = client_label(client)
+    # (client, auth) pairs that failed with an auth-scoped error stay dead
+    # for every mode; clients that lacked the format are only dead within
+    # the mode whose selector they could not satisfy.
+    dead_auth_attempts: set[tuple[str | None, str]] = set()
+    retry_base = _resolve_retry_seconds("YT_RETRY_BASE", DEFAULT_RETRY_BASE_SECONDS)
+    retry_cap = _resolve_retry_seconds("YT_RETRY_CAP", DEFAULT_RETRY_CAP_SECONDS)
+    # One logger for the whole retry ladder; each attempt resets it instead
+    # of allocating a fresh instance per (mode, attempt).
+    attempt_logger = SilentLogger()
+    try:
+        for mode_index, (mode_name, format_selector, requires_exact_match) in enumerate(
+            quality_modes, start=1
+        ):
             emit_status(
-                "attempt="
-                f"{attempt_index}/{len(attempts)}, mode={mode_name}, "
-                f"client={current_client}, auth={auth_context}"
+                f"quality_mode={mode_index}/{len(quality_modes)}, "
+                f"name={mode_name}, format={format_selector}"
             )
-            attempt_logger = SilentLogger()
-            try:
-                known_paths_before = {p.resolve() for p in output_dir.glob("*") if p.is_file()}
-                with yt_dlp.YoutubeDL(
-                    build_ydl_opts(format_selector, client, browser, attempt_logger)
-                ) as ydl:
-                    info = ydl.extract_info(normalized_url, download=True)
-                    output_path = resolve_downloaded_file_path(
-                        info, ydl, output_dir, known_paths_before
-                    )
-                    height = extract_selected_height(info) or probe_height_with_ffprobe(
-                        output_path
+            mode_dead_clients: set[str | None] = set()
+            # Backoff grows per client within a mode and resets when the mode
+            # (and so the format selector) changes.
+            mode_failure_counts: dict[str | None, int] = {}
+            for attempt_index, (client, auth_context, browser) in enumerate(
+                build_attempt_plan(effective_clients, effective_cookies_browsers), start=1
+            ):
+                current_client = client_label(client)
+                if client in mode_dead_clients or (client, auth_context) in dead_auth_attempts:
+                    emit_status(
+                        f"attempt_skip=client={current_client}, auth={auth_context}, "
+                        f"mode={mode_name}"
                     )
-                    format_id = extract_selected_format_id(info)
-
-                    if requires_exact_match and height != effective_target_quality:
-                        remove_file_if_exists(output_path)
-                        actual_height = "unknown" if height is None else str(height)
-                        reason = (
-                            f"client={current_client}, auth={auth_context}, mode={mode_name}: "
-                            f"actual_quality={actual_height} does_not_match_target={effective_target_quality}"
+                    continue
+                emit_status_lazy(
+                    lambda: "attempt="
+                    f"{attempt_index}/{attempt_total}, mode={mode_name}, "
+                    f"client={current_client}, auth={auth_context}"
+                )
+                attempt_logger.reset()
+                # A failed attempt can leave a partial stream count behind;
+                # the signaled flag itself must survive across attempts.
+                fetch_done_state["finished_streams"] = 0
+                try:
+                    known_inodes_before = snapshot_output_dir(output_dir)
+                    cache_key = (client, browser)
+                    ydl = ydl_cache.get(cache_key)
+                    if ydl is None:
+                        ydl = yt_dlp.YoutubeDL(
+                            build_ydl_opts(
+                                format_selector,
+                                client,
+                                browser,
+                                attempt_logger,
+                                requires_exact_match,
+                            )
                         )
-                        attempt_reasons.append(reason)
-                        emit_status(f"quality_retry={reason}")
-                        continue
+                        ydl_cache[cache_key] = ydl
+                    else:
+                        # logger and match_filter are read from params on each
+                        # call, but the format selector is compiled once in
+                        # YoutubeDL.__init__, so the cached instance must
+                        # recompile it when the quality mode changes.
+                        if ydl.params.get("format") != format_selector:
+                            ydl.params["format"] = format_selector
+                            ydl.format_selector = ydl.build_format_selector(
+                                format_selector
+                            )
+                        ydl.params["logger"] = attempt_logger
+                        if requires_exact_match and exact_match_filter is not None:
+                            ydl.params["match_filter"] = exact_match_filter
+                            ydl.params["break_on_reject"] = True
+                        else:
+                            ydl.params["match_filter"] = None
+                            ydl.params["break_on_reject"] = False
+                    cached_info = info_cache.get(cache_key)
+                    if cached_info is None:
+                        cached_info = ydl.extract_info(
+                            normalized_url, download=False, process=False
+                        )
+                        info_cache[cache_key] = cached_info
+                    if on_download_finished is not None:
+                        # Offline selection pass to learn how many streams the
+                        # chosen format resolves to; the progress hook needs
+                        # the count to signal fetch-done after the last one.
+                        preview = ydl.process_ie_result(
+                            copy.deepcopy(cached_info), download=False
+                        )
+                        requested = preview.get("requested_formats")
+                        fetch_done_state["expected_streams"] = (
+                            len(requested)
+                            if isinstance(requested, list) and requested
+                            else 1
+                        )
+                    # Applies this mode's format selector to the cached
+                    # formats and downloads only the chosen one; the deepcopy
+                    # keeps yt-dlp's in-place processing off the cache.
+                    info = ydl.process_ie_result(copy.deepcopy(cached_info), download=True)
+                    output_path = resolve_downloaded_file_path(
+                        info, ydl, output_dir, known_inodes_before
+                    )
+                    height, format_id = extract_selected_metadata(info)
+                    height = height or probe_height_with_ffprobe(output_path)
 
                     if (
                         not requires_exact_match
@@ -551,21 +837,47 @@ def download_youtube_mp4_720p(
                         fallback=fallback,
                         fallback_reason=fallback_reason,
                     )
-            except DownloadError as exc:
-                last_error = exc
-                message = clean_error_message(str(exc))
-                reason = (
-                    f"client={current_client}, auth={auth_context}, mode={mode_name}: {message}"
-                )
-                attempt_reasons.append(reason)
-                retryable = is_retryable_download_error(message)
-                emit_status(
-                    f"attempt_error=client={current_client}, auth={auth_context}, "
-                    f"retryable={'yes' if retryable else 'no'}, reason={message}"
-                )
-                if retryable:
+                except RejectedVideoReached:
+                    # The match filter refused every candidate before any
+                    # bytes were downloaded; this client's formats cannot
+                    # satisfy the exact target under this mode.
+                    reason = (
+                        f"client={current_client}, auth={auth_context}, mode={mode_name}: "
+                        f"no_format_with_height={effective_target_quality}"
+                    )
+                    attempt_reasons.append(reason)
+                    emit_status(f"quality_retry={reason}")
+                    mode_dead_clients.add(client)
+                    continue
+                except DownloadError as exc:
+                    last_error = exc
+                    message = clean_error_message(str(exc))
+                    reason = (
+                        f"client={current_client}, auth={auth_context}, mode={mode_name}: {message}"
+                    )
+                    attempt_reasons.append(reason)
+                    scope = classify_download_error(message)
+                    emit_status(
+                        f"attempt_error=client={current_client}, auth={auth_context}, "
+                        f"retry_scope={scope}, reason={message}"
+                    )
+                    if scope == RetryScope.NONE:
+                        raise
+                    if scope == RetryScope.AUTH:
+                        dead_auth_attempts.add((client, auth_context))
+                    else:
+                        mode_dead_clients.add(client)
+                    failure_count = mode_failure_counts.get(client, 0)
+                    mode_failure_counts[client] = failure_count + 1
+                    delay = retry_backoff_delay(failure_count, retry_base, retry_cap)
+                    emit_status(f"retry_backoff=delay={delay:.2f}s")
+                    time.sleep(delay)
                     continue
-                raise
+    finally:
+        # The cached instances replaced the per-attempt context manager;
+        # close them on every exit path.
+        for cached_ydl in ydl_cache.values():
+            cached_ydl.close()
 
     _ = allow_strict_relaxation
     summary = "; ".join(attempt_reasons[-4:]) if attempt_reasons else "no details"
@@ -575,11 +887,277 @@ def download_youtube_mp4_720p(
     ) from last_error
 
 
+def download_many(
+    urls: list[str],
+    cookies_from_browser: str | None = None,
+    target_quality: int | None = None,
+    min_height: int | None = None,
+    quality_policy: str | None = None,
+    player_clients: list[str] | None = None,
+    po_token_android: str | None = None,
+    po_token_ios: str | None = None,
+) -> list[DownloadOutcome]:
+    """Download several URLs through one shared YoutubeDL instance.
+
+    Building a YoutubeDL per URL re-imports extractors and rebuilds the
+    format parser every time. The shared instance covers the common case
+    (first client, no cookies, preferred quality mode); any URL it cannot
+    satisfy is retried through the full per-URL attempt plan.
+    """
+    if yt_dlp is None:
+        raise SystemExit("yt-dlp is required. Install dependencies with: pip install -r requirements.txt")
+
+    script_dir = Path(__file__).resolve().parent
+    output_dir = script_dir / "out"
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_template = str(output_dir / "%(title)s.%(ext)s")
+
+    effective_quality_policy = resolve_quality_policy(quality_policy)
+    effective_target_quality = resolve_target_quality(target_quality, min_height)
+    effective_clients = resolve_effective_clients(player_clients)
+    first_client = effective_clients[0]
+
+    if effective_quality_policy == "strict":
+        format_selector = build_exact_format_selector(effective_target_quality)
+    else:
+        format_selector = build_best_below_or_equal_selector(effective_target_quality)
+
+    ydl_opts = {
+        "format": format_selector,
+        "outtmpl": output_template,
+        "merge_output_format": "mp4",
+        "noplaylist": True,
+        "restrictfilenames": True,
+        "quiet": True,
+        "no_warnings": True,
+        "noprogress": True,
+        "logger": SilentLogger(),
+        "retries": 3,
+        "fragment_retries": 3,
+    }
+    youtube_args: dict[str, list[str]] = {}
+    if first_client:
+        youtube_args["player_client"] = [first_client]
+    if po_token_android:
+        youtube_args["po_token"] = [f"android.gvs+{po_token_android}"]
+    if po_token_ios:
+        youtube_args.setdefault("po_token", []).append(f"ios.gvs+{po_token_ios}")
+    if youtube_args:
+        ydl_opts["extractor_args"] = {"youtube": youtube_args}
+
+    emit_status(
+        f"batch_size={len(urls)}, shared_client={client_label(first_client)}, "
+        f"format={format_selector}"
+    )
+    outcomes: dict[int, DownloadOutcome] = {}
+    retry_indexes: list[int] = []
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        for index, url in enumerate(urls):
+            normalized_url = normalize_youtube_url(url)
+            try:
+                known_inodes_before = snapshot_output_dir(output_dir)
+                info = ydl.extract_info(normalized_url, download=True)
+                output_path = resolve_downloaded_file_path(
+                    info, ydl, output_dir, known_inodes_before
+                )
+                height, format_id = extract_selected_metadata(info)
+                height = height or probe_height_with_ffprobe(output_path)
+            except DownloadError as exc:
+                message = clean_error_message(str(exc))
+                emit_status(f"batch_retry=url_index={index}, reason={message}")
+                retry_indexes.append(index)
+                continue
+
+            if effective_quality_policy == "strict":
+                acceptable = height == effective_target_quality
+            else:
+                acceptable = height is None or height <= effective_target_quality
+            if not acceptable:
+                remove_file_if_exists(output_path)
+                actual_height = "unknown" if height is None else str(height)
+                emit_status(
+                    f"batch_retry=url_index={index}, "
+                    f"actual_quality={actual_height}, target={effective_target_quality}"
+                )
+                retry_indexes.append(index)
+                continue
+
+            fallback = height is not None and height < effective_target_quality
+            fallback_reason = (
+                f"requested={effective_target_quality}, actual={height}" if fallback else None
+            )
+            outcomes[index] = DownloadOutcome(
+                path=output_path,
+                client=client_label(first_client),
+                auth_context="none",
+                height=height,
+                format_id=format_id,
+                target_quality=effective_target_quality,
+                quality_policy=effective_quality_policy,
+                fallback=fallback,
+                fallback_reason=fallback_reason,
+            )
+
+    for index in retry_indexes:
+        outcomes[index] = download_youtube_mp4_720p(
+            urls[index],
+            cookies_from_browser=cookies_from_browser,
+            target_quality=target_quality,
+            min_height=min_height,
+            quality_policy=quality_policy,
+            player_clients=player_clients,
+            po_token_android=po_token_android,
+            po_token_ios=po_token_ios,
+        )
+
+    return [outcomes[index] for index in range(len(urls))]
+
+
+def outcome_payload(result: DownloadOutcome) -> dict:
+    selected_height = result.height if result.height is not None else None
+    selected_format = result.format_id if result.format_id else "unknown"
+    return {
+        "file_path": str(result.path),
+        "target_quality": result.target_quality,
+        "actual_quality": selected_height,
+        "fallback": result.fallback,
+        "fallback_reason": result.fallback_reason,
+        "selected_client": result.client,
+        "selected_auth": result.auth_context,
+        "selected_format": selected_format,
+        "cookies_used": result.auth_context.startswith("cookies:"),
+    }
+
+
+# Set per worker process by _init_batch_worker; carries "fetch finished,
+# mux in progress" signals back to the parent so it can refill the slot.
+_BATCH_SIGNAL_QUEUE = None
+
+
+def _init_batch_worker(signal_queue) -> None:
+    global _BATCH_SIGNAL_QUEUE
+    _BATCH_SIGNAL_QUEUE = signal_queue
+
+
+def _download_url_payload(url: str, options: dict) -> dict:
+    """Worker-side wrapper: one URL in, one JSON-ready payload out.
+
+    Runs in a pool process, so failures are folded into the payload instead
+    of raising across the pickle boundary. When the network fetch completes
+    and only the mux remains, the parent is notified through the signal
+    queue so the next URL's fetch can overlap this URL's ffmpeg run.
+    """
+    signaled = False
+
+    def _signal_fetch_done() -> None:
+        nonlocal signaled
+        if not signaled and _BATCH_SIGNAL_QUEUE is not None:
+            signaled = True
+            _BATCH_SIGNAL_QUEUE.put(url)
+
+    try:
+        result = download_youtube_mp4_720p(
+            url, on_download_finished=_signal_fetch_done, **options
+        )
+    except (DownloadError, SystemExit) as exc:
+        payload = {"url": url, "status": "error", "error": str(exc)}
+    else:
+        payload = outcome_payload(result)
+        payload["url"] = url
+        payload["status"] = "ok"
+    payload["_fetch_slot_released"] = signaled
+    return payload
+
+
+def read_batch_urls(batch_file: str) -> list[str]:
+    stream = sys.stdin if batch_file == "-" else open(batch_file, encoding="utf-8")
+    try:
+        urls = []
+        for line in stream:
+            stripped = line.strip()
+            if stripped and not stripped.startswith("#"):
+                urls.append(stripped)
+        return urls
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def _drain_fetch_signals(signal_queue, loop, semaphore) -> None:
+    while True:
+        item = signal_queue.get()
+        if item is None:
+            return
+        loop.call_soon_threadsafe(semaphore.release)
+
+
+async def amain(urls: list[str], options: dict, concurrency: int) -> int:
+    """Drive N concurrent downloads; returns the number of failed URLs.
+
+    yt-dlp calls are blocking and partly CPU-bound (muxing), so each runs in
+    a pool process via run_in_executor; the semaphore caps in-flight network
+    fetches to stay under YouTube rate limits. A fetch's slot is handed back
+    as soon as its worker reports "download finished, mux remaining", so the
+    next URL's fetch overlaps the previous URL's ffmpeg run — hence the pool
+    holds twice as many workers as fetch slots. Results are printed as JSON
+    lines in completion order.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    signal_queue: multiprocessing.Queue = multiprocessing.Queue()
+    drainer = threading.Thread(
+        target=_drain_fetch_signals, args=(signal_queue, loop, semaphore), daemon=True
+    )
+    drainer.start()
+    failures = 0
+    try:
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=concurrency * 2,
+            initializer=_init_batch_worker,
+            initargs=(signal_queue,),
+        ) as executor:
+
+            async def run_one(url: str) -> dict:
+                await semaphore.acquire()
+                payload = await loop.run_in_executor(
+                    executor, _download_url_payload, url, options
+                )
+                # The drainer releases the slot when the worker signals; only
+                # release here if the worker never got that far (early error).
+                if not payload.pop("_fetch_slot_released", False):
+                    semaphore.release()
+                return payload
+
+            for completed in asyncio.as_completed([run_one(url) for url in urls]):
+                payload = await completed
+                sys.stdout.write(dumps_json(payload) + "\n")
+                sys.stdout.flush()
+                if payload.get("status") != "ok":
+                    failures += 1
+    finally:
+        signal_queue.put(None)
+        drainer.join()
+    return failures
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Download YouTube video as MP4 with target quality and fallback policy."
     )
-    parser.add_argument("url", help="YouTube video URL")
+    parser.add_argument("url", nargs="?", default=None, help="YouTube video URL")
+    parser.add_argument(
+        "--batch-file",
+        dest="batch_file",
+        default=None,
+        help="File with one URL per line ('-' for stdin); downloads run concurrently",
+    )
+    parser.add_argument(
+        "--concurrency",
+        dest="concurrency",
+        type=int,
+        default=4,
+        help="Max simultaneous downloads in batch mode (keep small to respect rate limits)",
+    )
     parser.add_argument(
         "--cookies-from-browser",
         dest="cookies_from_browser",
@@ -633,37 +1211,35 @@ def main() -> None:
     args = parse_args()
     po_token_android = args.po_token_android or os.getenv("YT_PO_TOKEN_ANDROID")
     po_token_ios = args.po_token_ios or os.getenv("YT_PO_TOKEN_IOS")
+    options = {
+        "cookies_from_browser": args.cookies_from_browser,
+        "target_quality": args.target_quality,
+        "min_height": args.min_height,
+        "quality_policy": args.quality_policy,
+        "player_clients": args.player_clients,
+        "po_token_android": po_token_android,
+        "po_token_ios": po_token_ios,
+    }
+
+    if args.batch_file is not None:
+        urls = read_batch_urls(args.batch_file)
+        if not urls:
+            raise SystemExit("batch file contains no URLs")
+        failures = asyncio.run(amain(urls, options, max(1, args.concurrency)))
+        raise SystemExit(1 if failures else 0)
+
+    if args.url is None:
+        raise SystemExit("a URL or --batch-file is required")
+
     try:
-        result = download_youtube_mp4_720p(
-            args.url,
-            cookies_from_browser=args.cookies_from_browser,
-            target_quality=args.target_quality,
-            min_height=args.min_height,
-            quality_policy=args.quality_policy,
-            player_clients=args.player_clients,
-            po_token_android=po_token_android,
-            po_token_ios=po_token_ios,
-        )
+        result = download_youtube_mp4_720p(args.url, **options)
     except DownloadError as exc:
         raise SystemExit(str(exc)) from exc
-    selected_height = result.height if result.height is not None else None
-    selected_format = result.format_id if result.format_id else "unknown"
-    cookies_used = result.auth_context.startswith("cookies:")
     if result.fallback and result.fallback_reason:
         emit_status(f"quality_fallback_reason={result.fallback_reason}")
 
-    output_payload = {
-        "file_path": str(result.path),
-        "target_quality": result.target_quality,
-        "actual_quality": selected_height,
-        "fallback": result.fallback,
-        "fallback_reason": result.fallback_reason,
-        "selected_client": result.client,
-        "selected_auth": result.auth_context,
-        "selected_format": selected_format,
-        "cookies_used": cookies_used,
-    }
-    print(json.dumps(output_payload, ensure_ascii=False))
+    sys.stdout.write(dumps_json(outcome_payload(result)) + "\n")
+    sys.stdout.flush()
 
 
 if __name__ == "__main__":